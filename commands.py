@@ -0,0 +1,85 @@
+import importlib
+
+# Setuptools entry point group third-party packages use to add commands, e.g.
+#   entry_points={"termnotes.commands": ["wc = mypkg.wc:count_words"]}
+# The handler is called with the text typed after the command name.
+ENTRY_POINT_GROUP = "termnotes.commands"
+
+_registry = {}
+
+def no_args(rest):
+  """Parser for commands that take nothing, like 'l' or 'q'."""
+  if rest:
+    return None
+  return ()
+
+def one_arg(rest):
+  """Parser for commands that take the rest of the line, like 'o name'."""
+  if not rest:
+    return None
+  return (rest,)
+
+def raw(rest):
+  """Parser that hands the rest of the line over as-is, even when empty."""
+  return (rest,)
+
+def load(spec):
+  """Imports and returns the object a 'module:attr' string points to."""
+  module_name, _, attr = spec.partition(":")
+  return getattr(importlib.import_module(module_name), attr)
+
+class Command:
+  """A registered command. The handler is a callable or a 'module:attr' string loaded on first use."""
+
+  def __init__(self, name, parser, handler, help="", instructions=""):
+    self.name = name
+    self.parser = parser
+    self.help = help  # One line for 'help'
+    self.instructions = instructions  # Longer text for 'inst'; 'help' is used when empty
+    self._handler = handler
+
+  @property
+  def handler(self):
+    if isinstance(self._handler, str):
+      self._handler = load(self._handler)
+    elif hasattr(self._handler, "load"):  # Plugin entry point
+      self._handler = self._handler.load()
+    return self._handler
+
+def register(name, parser, handler, help="", instructions=""):
+  """Registers a command under 'name', replacing any earlier one with that name."""
+  _registry[name] = Command(name, parser, handler, help, instructions)
+
+def get(name):
+  return _registry.get(name)
+
+def all_commands():
+  return list(_registry.values())
+
+def _plugin_entry_points():
+  try:
+    from importlib.metadata import entry_points
+  except ImportError:  # Python < 3.8 uses the backport
+    from importlib_metadata import entry_points
+  eps = entry_points()
+  if hasattr(eps, "select"):
+    return eps.select(group=ENTRY_POINT_GROUP)
+  return eps.get(ENTRY_POINT_GROUP, [])
+
+def load_plugins():
+  """Registers plugin commands without importing them; built-ins keep their names."""
+  for ep in _plugin_entry_points():
+    if ep.name not in _registry:
+      register(ep.name, raw, ep, help=f"{ep.name} - plugin ({ep.value})")
+
+def dispatch(choice):
+  """Runs the command typed at the prompt. Returns False if nothing matched."""
+  name, _, rest = choice.partition(" ")
+  command = _registry.get(name)
+  if command is None:
+    return False
+  args = command.parser(rest)
+  if args is None:
+    return False
+  command.handler(*args)
+  return True
@@ -0,0 +1,135 @@
+import mmap
+import os
+import re
+import signal
+from multiprocessing import Pool, cpu_count
+from rich.console import Console
+from rich.markup import escape
+
+console = Console()
+
+CONTEXT = 1  # Lines shown before and after each match
+MIN_FILES_FOR_POOL = 64  # Below this, starting worker processes costs more than it saves
+
+_pattern = None  # Set by _set_pattern in whichever process runs grep_file
+
+def _set_pattern(pattern):
+  global _pattern
+  _pattern = re.compile(pattern, re.MULTILINE)
+
+def _init_worker(pattern):
+  signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is handled once, in the REPL process
+  _set_pattern(pattern)
+
+def grep_file(path):
+  """Returns (path, hits) where each hit is (lineno, before, line, start, end, after)."""
+  hits = []
+  try:
+    with open(path, "rb") as f:
+      if os.fstat(f.fileno()).st_size == 0:
+        return path, hits
+      # Decoding straight from the mapping skips the extra bytes copy f.read() would make.
+      # The pattern runs on str so \w, \b, . and [éè] match Unicode text like ripgrep does.
+      with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        text = str(data, "utf-8", errors="replace")
+  except (OSError, ValueError):
+    return path, hits
+
+  lineno = 1
+  counted_to = 0
+  line_end = -1
+  for match in _pattern.finditer(text):
+    if match.start() <= line_end:
+      continue  # One hit per line, like grep
+    if match.start() == len(text) and text.endswith("\n"):
+      break  # The end after a final newline isn't a line of its own
+    lineno += text.count("\n", counted_to, match.start())
+    counted_to = match.start()
+    line_start = text.rfind("\n", 0, match.start()) + 1
+    line_end = text.find("\n", match.start())
+    if line_end == -1:
+      line_end = len(text)
+
+    before = []
+    pos = line_start
+    for _ in range(CONTEXT):
+      if pos == 0:
+        break
+      prev_start = text.rfind("\n", 0, pos - 1) + 1
+      before.insert(0, text[prev_start:pos - 1].rstrip("\r"))
+      pos = prev_start
+
+    after = []
+    pos = line_end
+    for _ in range(CONTEXT):
+      if pos >= len(text) - 1:
+        break
+      next_end = text.find("\n", pos + 1)
+      if next_end == -1:
+        next_end = len(text)
+      after.append(text[pos + 1:next_end].rstrip("\r"))
+      pos = next_end
+
+    line = text[line_start:line_end].rstrip("\r")
+    start = match.start() - line_start
+    end = min(match.end() - line_start, len(line))
+    hits.append((lineno, before, line, start, end, after))
+  return path, hits
+
+def note_files(base_dir):
+  files = []
+  for folder in os.scandir(base_dir):
+    if folder.is_dir():
+      files.extend(entry.path for entry in os.scandir(folder.path) if entry.name.endswith(".md") and entry.is_file())
+  return files
+
+def _print_hits(base_dir, path, hits):
+  key = os.path.relpath(path, base_dir)[:-3]
+  console.print(f"[bold]{escape(key)}[/bold] (n)")
+  width = len(str(hits[-1][0]))
+  for lineno, before, line, start, end, after in hits:
+    for offset, text in enumerate(before):
+      console.print(f"[dim]{lineno - len(before) + offset:>{width}}- {escape(text)}[/dim]")
+    console.print(f"[bold blue]{lineno:>{width}}:[/bold blue] {escape(line[:start])}[bold red]{escape(line[start:end])}[/bold red]{escape(line[end:])}")
+    for offset, text in enumerate(after):
+      console.print(f"[dim]{lineno + offset + 1:>{width}}- {escape(text)}[/dim]")
+  console.print("")
+
+def grep(base_dir, pattern):
+  """Prints every line in the vault matching a regex, streaming results as files finish."""
+  try:
+    re.compile(pattern, re.MULTILINE)
+  except re.error as e:
+    console.print(f"\n[bold red]Invalid regex: {e}[/bold red]\n")
+    return
+
+  files = note_files(base_dir)
+  matched_lines = 0
+  matched_notes = 0
+  console.print("")
+  pool = None
+  try:
+    if len(files) < MIN_FILES_FOR_POOL:
+      _set_pattern(pattern)
+      results = map(grep_file, files)
+    else:
+      workers = cpu_count() or 1
+      pool = Pool(workers, initializer=_init_worker, initargs=(pattern,))
+      results = pool.imap_unordered(grep_file, files, chunksize=max(1, len(files) // (workers * 8)))
+    for path, hits in results:
+      if hits:
+        _print_hits(base_dir, path, hits)
+        matched_lines += len(hits)
+        matched_notes += 1
+  except KeyboardInterrupt:
+    console.print("[bold yellow]Grep canceled.[/bold yellow]\n")
+    return
+  finally:
+    if pool is not None:
+      pool.terminate()
+      pool.join()
+
+  if matched_lines:
+    console.print(f"[bold green]{matched_lines} matching lines in {matched_notes} notes.[/bold green]\n")
+  else:
+    console.print("[bold red]No matches found.[/bold red]\n")
@@ -9,9 +9,11 @@ from rich.panel import Panel
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.box import DOUBLE_EDGE
+from rich.markup import escape
 import glob
 import platform
 import subprocess
+import commands
 
 console = Console()
 
@@ -21,11 +23,28 @@ def clear_terminal():
   else:
     os.system("clear")
 
+def print_banner():
+  print(r"""
+ __        __   _                            _
+ \ \      / /__| | ___ ___  _ __ ___   ___  | |_ ___
+  \ \ /\ / / _ \ |/ __/ _ \| '_ ` _ \ / _ \ | __/ _ \
+   \ V  V /  __/ | (_| (_) | | | | | |  __/ | || (_) |
+  _ \_/\_/ \___|_|\___\___/|_| |_| |_|\___|  \__\___/
+ | |_ ___ _ __ _ __ ___  _ __   ___ | |_ ___  ___
+ | __/ _ \ '__| '_ ` _ \| '_ \ / _ \| __/ _ \/ __|
+ | ||  __/ |  | | | | | | | | | (_) | ||  __/\__ \
+  \__\___|_|  |_| |_| |_|_| |_|\___/ \__\___||___/
+  """)
+  print("'Help' for commands.")
+
 # Get the system-specific Notes folder
 # BASE_DIR = appdirs.user_data_dir("Termnotes", "Termnotes")
 BASE_DIR = os.path.join(os.path.expanduser("~"), "Documents", "Termnotes")
 CONFIG_FILE = "config.json"
+GREP_HANDLER = "grep:grep"  # Loaded on first use by both 's /regex/' and 'grep'
 in_folder = None  # Tracks current folder
+current_note = None  # (folder, name) of the last opened note
+running = True  # Cleared by 'q' to leave the REPL loop
 
 # Ensure the directory exists
 os.makedirs(BASE_DIR, exist_ok=True)
@@ -181,6 +200,7 @@ def create_note(folder, name, song=None):
         else:
           f.write(f"-- {name} --")
     subprocess.run(["nvim", note_path])
+    remember_note(folder, name)
     print(f"\n[bold green]New note '{name}' created in '{folder}'.[/bold green]\n")
   else:
     print("\n[bold red]There's already a file with that name.[/bold red]\n")
@@ -192,6 +212,16 @@ def search(query):
   found_notes_by_tag = {}
   search_term = query.lower()
 
+  if query.startswith("/"):  # Raw regex over every note, e.g. 's /ticket-\d{4}/'
+    pattern = query[1:]
+    if pattern.endswith("/"):
+      pattern = pattern[:-1]
+    if not pattern:
+      console.print("\n[bold red]Empty regex. Use 's /pattern/'.[/bold red]\n")
+      return
+    commands.load(GREP_HANDLER)(BASE_DIR, pattern)
+    return
+
   if query.startswith("#"):
     tag_to_search = query[1:].strip().lower()
     for folder in os.listdir(BASE_DIR):
@@ -329,35 +359,13 @@ def search(query):
       folder_to_open = found_folders[0]
       if os.path.exists(os.path.join(BASE_DIR, folder_to_open)):
         clear_terminal()
-        print(r"""
- __        __   _                            _
- \ \      / /__| | ___ ___  _ __ ___   ___  | |_ ___
-  \ \ /\ / / _ \ |/ __/ _ \| '_ ` _ \ / _ \ | __/ _ \
-   \ V  V /  __/ | (_| (_) | | | | | |  __/ | || (_) |
-  _ \_/\_/ \___|_|\___\___/|_| |_| |_|\___|  \__\___/
- | |_ ___ _ __ _ __ ___  _ __   ___ | |_ ___  ___
- | __/ _ \ '__| '_ ` _ \| '_ \ / _ \| __/ _ \/ __|
- | ||  __/ |  | | | | | | | | | (_) | ||  __/\__ \
-  \__\___|_|  |_| |_| |_|_| |_|\___/ \__\___||___/
-  """)
-        print("'Help' for commands.")
+        print_banner()
         in_folder = folder_to_open
         list_notes(in_folder)
         return
     elif not found_folders and len(found_notes_by_name) == 1:
       clear_terminal()
-      print(r"""
- __        __   _                            _
- \ \      / /__| | ___ ___  _ __ ___   ___  | |_ ___
-  \ \ /\ / / _ \ |/ __/ _ \| '_ ` _ \ / _ \ | __/ _ \
-   \ V  V /  __/ | (_| (_) | | | | | |  __/ | || (_) |
-  _ \_/\_/ \___|_|\___\___/|_| |_| |_|\___|  \__\___/
- | |_ ___ _ __ _ __ ___  _ __   ___ | |_ ___  ___
- | __/ _ \ '__| '_ ` _ \| '_ \ / _ \| __/ _ \/ __|
- | ||  __/ |  | | | | | | | | | (_) | ||  __/\__ \
-  \__\___|_|  |_| |_| |_|_| |_|\___/ \__\___||___/
-  """)
-      print("'Help' for commands.")
+      print_banner()
       folder, note_to_open = found_notes_by_name[0]
       read_note(folder, note_to_open)
       list_notes(folder)
@@ -383,6 +391,11 @@ def read_note(folder, name):
   list_notes(in_folder)
 
   subprocess.run(["nvim", os.path.join(BASE_DIR, folder, f"{name}.md")])
+  remember_note(folder, name)
+
+def remember_note(folder, name):
+  global current_note
+  current_note = (folder, name)
 
 def delete_note_or_folder(name, is_folder):
   """Deletes a note or folder."""
@@ -455,164 +468,181 @@ def move_note_or_folder(source, destination):
     print(f"\n[bold red]Error moving: {e}[/bold red]\n")
 
 
-def run():
-  # Initialize storage
-  setup()
+def open_folder_or_note(name):
   global in_folder
+  clear_terminal()
+  print_banner()
+  if in_folder:
+    read_note(in_folder, name)
+  else:
+    if os.path.exists(os.path.join(BASE_DIR, name)):
+      in_folder = name
+      list_notes(name)
+    else:
+      list_folders()
+      print("[bold red]Folder not found.[/bold red]\n")
 
-  print(r"""
- __        __   _                            _
- \ \      / /__| | ___ ___  _ __ ___   ___  | |_ ___
-  \ \ /\ / / _ \ |/ __/ _ \| '_ ` _ \ / _ \ | __/ _ \
-   \ V  V /  __/ | (_| (_) | | | | | |  __/ | || (_) |
-  _ \_/\_/ \___|_|\___\___/|_| |_| |_|\___|  \__\___/
- | |_ ___ _ __ _ __ ___  _ __   ___ | |_ ___  ___
- | __/ _ \ '__| '_ ` _ \| '_ \ / _ \| __/ _ \/ __|
- | ||  __/ |  | | | | | | | | | (_) | ||  __/\__ \
-  \__\___|_|  |_| |_| |_|_| |_|\___/ \__\___||___/
-  """)
-  print("'Help' for commands.")
-  list_folders()
-
-  if "Calendar" not in [f for f in os.listdir(BASE_DIR) if os.path.isdir(os.path.join(BASE_DIR, f))]:
-    create_folder("Calendar") 
-
-  while True:
-    choice = console.input("[bold blue]cmd: [/bold blue]").strip()
+def delete_command(name):
+  if in_folder:
+    delete_note_or_folder(os.path.join(in_folder, name), is_folder=False)
+  else:
+    delete_note_or_folder(name, is_folder=True)
 
-    if choice.startswith("o "):  # Open a folder or note
-      clear_terminal()
-      print(r"""
- __        __   _                            _
- \ \      / /__| | ___ ___  _ __ ___   ___  | |_ ___
-  \ \ /\ / / _ \ |/ __/ _ \| '_ ` _ \ / _ \ | __/ _ \
-   \ V  V /  __/ | (_| (_) | | | | | |  __/ | || (_) |
-  _ \_/\_/ \___|_|\___\___/|_| |_| |_|\___|  \__\___/
- | |_ ___ _ __ _ __ ___  _ __   ___ | |_ ___  ___
- | __/ _ \ '__| '_ ` _ \| '_ \ / _ \| __/ _ \/ __|
- | ||  __/ |  | | | | | | | | | (_) | ||  __/\__ \
-  \__\___|_|  |_| |_| |_|_| |_|\___/ \__\___||___/
-  """)
-      print("'Help' for commands.")
-      name = choice[2:]
-      if in_folder:
-        read_note(in_folder, name)
-      else:
-        if os.path.exists(os.path.join(BASE_DIR, name)):
-          in_folder = name
-          list_notes(name)
-        else:
-          list_folders()
-          print("[bold red]Folder not found.[/bold red]\n")
+def new_note_command(name, song=None):
+  if in_folder:
+    create_note(in_folder, name, song)
+  else:
+    print("\nGo into a folder to create a note.\n")
 
-    elif choice.startswith("d "):  # Delete folder or note
-      name = choice[2:]
-      if in_folder:
-        delete_note_or_folder(os.path.join(in_folder, name), is_folder=False)
-      else:
-        delete_note_or_folder(name, is_folder=True)
+def new_song_command(name):
+  new_note_command(name, "yes")
 
-    elif choice.startswith("nf "):  # New folder
-      name = choice[3:]
-      create_folder(name)
+def list_command():
+  clear_terminal()
+  print_banner()
+  if in_folder:
+    list_notes(in_folder)
+  else:
+    list_folders()
 
-    elif choice.startswith("nn "):  # New note
-      if in_folder:
-        name = choice[3:]
-        create_note(in_folder, name)
-      else:
-          print("\nGo into a folder to create a note.\n")
+def back_command():
+  global in_folder
+  clear_terminal()
+  print_banner()
+  if in_folder:
+    in_folder = None
+    list_folders()
+  else:
+    list_folders()
+    print("Nowhere to go.\n")
 
-    elif choice.startswith("ns "):
-      if in_folder:
-        name = choice[3:]
-        create_note(in_folder, name, "yes")
-      else:
-        print("\nGo into a folder to create a note.\n")
+def edit_command(name):
+  if in_folder:
+    console.print("\n[bold red]Go into the root folder to edit a folder.[/bold red]")
+  else:
+    edit_note_or_folder(name)
 
-    elif choice == "l":  # List folders or notes
-      clear_terminal()
-      print(r"""
- __        __   _                            _
- \ \      / /__| | ___ ___  _ __ ___   ___  | |_ ___
-  \ \ /\ / / _ \ |/ __/ _ \| '_ ` _ \ / _ \ | __/ _ \
-   \ V  V /  __/ | (_| (_) | | | | | |  __/ | || (_) |
-  _ \_/\_/ \___|_|\___\___/|_| |_| |_|\___|  \__\___/
- | |_ ___ _ __ _ __ ___  _ __   ___ | |_ ___  ___
- | __/ _ \ '__| '_ ` _ \| '_ \ / _ \| __/ _ \/ __|
- | ||  __/ |  | | | | | | | | | (_) | ||  __/\__ \
-  \__\___|_|  |_| |_| |_|_| |_|\___/ \__\___||___/
-  """)
-      print("'Help' for commands.")
-      if in_folder:
-        list_notes(in_folder)
-      else:
-        list_folders()
+def help_command():
+  lines = [c.help for c in commands.all_commands() if c.help]
+  console.print("\n[bold blue]Commands:[/bold blue]\n\n" + "\n".join(lines) + "\ntab - autocomplete\n")
 
-    elif choice == "b":  # Go back to folders
-      clear_terminal()
-      print(r"""
- __        __   _                            _
- \ \      / /__| | ___ ___  _ __ ___   ___  | |_ ___
-  \ \ /\ / / _ \ |/ __/ _ \| '_ ` _ \ / _ \ | __/ _ \
-   \ V  V /  __/ | (_| (_) | | | | | |  __/ | || (_) |
-  _ \_/\_/ \___|_|\___\___/|_| |_| |_|\___|  \__\___/
- | |_ ___ _ __ _ __ ___  _ __   ___ | |_ ___  ___
- | __/ _ \ '__| '_ ` _ \| '_ \ / _ \| __/ _ \/ __|
- | ||  __/ |  | | | | | | | | | (_) | ||  __/\__ \
-  \__\___|_|  |_| |_| |_|_| |_|\___/ \__\___||___/
-  """)
-      print("'Help' for commands.")
-      if in_folder:
-        in_folder = None
-        list_folders()
-      else:
-        list_folders()
-        print("Nowhere to go.\n")
+def inst_command():
+  lines = [c.instructions or c.help for c in commands.all_commands() if c.instructions or c.help]
+  console.print("\n[bold blue]Instructions:[/bold blue]\n\n" + "\n".join(lines) + "\n([bold]f[/bold]) - type of (folder)\n([bold]n[/bold]) - type of (note)\n[bold]tab[/bold] - autocomplete\n")
 
-    elif choice.startswith("e "):  # Edit folder or note
-      if in_folder:
-        console.print("\n[bold red]Go into the root folder to edit a folder.[/bold red]")
-      else:
-        name = choice[2:]
-        edit_note_or_folder(name)
+def quit_command():
+  global running
+  running = False
 
-    elif choice.startswith("s "):
-      name = choice[2:]
-      search(name)
+def daily_note_command():
+  global in_folder
+  clear_terminal()
+  if "dailys" not in [f for f in os.listdir(BASE_DIR) if os.path.isdir(os.path.join(BASE_DIR, f))]:
+    create_folder("dailys")
+  in_folder = "dailys"
+  print(f"[bold green]You are in 'dailys' folder.[/bold green]\n")
+  name = datetime.today().strftime('%Y-%m-%d')
+  create_note(in_folder, name)
+
+def move_command(specification):
+  specification = specification.strip()
+  if " " not in specification:
+    print("\n[bold red]Invalid format. Use 'mv source destination'.[/bold red]\n")
+  else:
+    # Split the input into source and destination, accounting for spaces in names
+    try:
+      source, destination = specification.split(" ", 1)
+      move_note_or_folder(source.strip(), destination.strip())
+    except ValueError:
+      print("\n[bold red]Invalid format. Use 'mv source destination'.[/bold red]\n")
+
+def parse_related(rest):
+  """'rel' or 'rel 10'; passes the vault and the last opened note to the handler."""
+  if not rest:
+    return (BASE_DIR, current_note)
+  if rest.isdigit() and int(rest) > 0:
+    return (BASE_DIR, current_note, int(rest))
+  return None
+
+def parse_grep(rest):
+  """'grep regex'; the same search as 's /regex/'."""
+  if not rest:
+    return None
+  return (BASE_DIR, rest)
+
+def register_commands():
+  """Registers the built-in commands. Handlers given as 'module:attr' load on first use."""
+  commands.register("o", commands.one_arg, open_folder_or_note,
+    help="o name - open a folder/note",
+    instructions="[bold]o name[/bold] - if you're in the root folder, it opens a folder, if you're in a folder, it opens a note")
+  commands.register("nf", commands.one_arg, create_folder,
+    help="nf name - create a new folder",
+    instructions="[bold]nf name[/bold] - creates a folder with the given name into the root folder")
+  commands.register("nn", commands.one_arg, new_note_command,
+    help="nn name - create a new note",
+    instructions="[bold]nn name[/bold] - create a new note with the given name. Must be inside of a folder!")
+  commands.register("ns", commands.one_arg, new_song_command,
+    help="ns name - create a new song note",
+    instructions="[bold]ns name[/bold] - create a new note with sections for chords, lyrics and chorus. Must be inside of a folder!")
+  commands.register("dn", commands.no_args, daily_note_command,
+    help="dn - creates a daily note in the 'dailys' folder",
+    instructions="[bold]dn[/bold] - creates a new note with the current dater. Adds it to the 'dailys' folder, if not created then it will create it.")
+  commands.register("d", commands.one_arg, delete_command,
+    help="d name - delete a folder/note",
+    instructions="[bold]d name[/bold] - if you're in the root folder, it deletes a folder, if you're in a folder, it deletes a note")
+  commands.register("l", commands.no_args, list_command,
+    help="l - list folders/notes",
+    instructions="[bold]l[/bold] - if you're in the root folder, it lists all folders, if you're in a folder, it lists all notes")
+  commands.register("b", commands.no_args, back_command,
+    help="b - back to folders",
+    instructions="[bold]b[/bold] - takes you back to the root folder")
+  commands.register("e", commands.one_arg, edit_command,
+    help="e name - edit folder",
+    instructions="[bold]e name[/bold] - it allows you to edit the folder name")
+  commands.register("s", commands.one_arg, search,
+    help="s name - search\ns /regex/ - search inside every note",
+    instructions="[bold]s name[/bold] - search for folder or note. If found, you can open the folder in which it was found (search is case sensitive)\n[bold]s /regex/[/bold] - searches the text of every note with a regular expression and shows matching lines as they're found. Ctrl-C stops the search")
+  commands.register("grep", parse_grep, GREP_HANDLER,
+    help="grep regex - same as 's /regex/'",
+    instructions="[bold]grep regex[/bold] - same as [bold]s /regex/[/bold]")
+  commands.register("rel", parse_related, "related:show_related",
+    help="rel - notes related to the last opened note",
+    instructions="[bold]rel[/bold] - lists the notes most similar to the last note you opened. Add a number to show more, e.g. 'rel 10'")
+  commands.register("mv", commands.one_arg, move_command,
+    help="mv folder/note destination - moves a note to the destination folder",
+    instructions="[bold]mv folder/note destination[/bold] - moves a note to the destination folder. [bold]Does not work for names with spaces[/bold]")
+  commands.register("help", commands.no_args, help_command,
+    help="help - displays commands",
+    instructions="[bold]help[/bold] - displays commands")
+  commands.register("inst", commands.no_args, inst_command,
+    help="inst - more specific instructions",
+    instructions="[bold]inst[/bold] - more specific instructions")
+  commands.register("q", commands.no_args, quit_command,
+    help="q - quit",
+    instructions="[bold]q[/bold] - quits the application")
 
-    elif choice == "help":
-        console.print("\n[bold blue]Commands:[/bold blue]\n\no name - open a folder/note\nnf name - create a new folder\nnn name - create a new note\nd name - delete a folder/note\nl - list folders/notes\nb - back to folders\ne name - edit folder\ns name - search\ndn - creates a daily note in the 'dailys' folder\nhelp - displays commands\ninst - more specific instructions\nq - quit\nq - quit\ntab - autocomplete\nmv folder/note destination - moves a note to the destination folder\n")
+def run():
+  global running
+  running = True
+  # Initialize storage
+  setup()
+  register_commands()
+  commands.load_plugins()
 
-    elif choice == "inst":
-        console.print("\n[bold blue]Instructions:[/bold blue]\n\n[bold]o name[/bold] - if you're in the root folder, it opens a folder, if you're in a folder, it opens a note\n[bold]nf name[/bold] - creates a folder with the given name into the root folder\n[bold]nn name[/bold] - create a new note with the given name. Must be inside of a folder!\n[bold]dn[/bold] - creates a new note with the current dater. Adds it to the 'dailys' folder, if not created then it will create it.\n[bold]d name[/bold] - if you're in the root folder, it deletes a folder, if you're in a folder, it deletes a note\n[bold]l[/bold] - if you're in the root folder, it lists all folders, if you're in a folder, it lists all notes\n[bold]b[/bold] - takes you back to the root folder\n[bold]e name[/bold] - it allows you to edit the folder name\n[bold]s name[/bold] - search for folder or note. If found, you can open the folder in which it was found (search is case sensitive)\n([bold]f[/bold]) - type of (folder)\n([bold]n[/bold]) - type of (note)\n[bold]help[/bold] - displays commands\n[bold]inst[/bold] - more specific instructions\n[bold]q[/bold] - quits the application\n[bold]mv folder/note destination[/bold] - moves a note to the destination folder. [bold]Does not work for names with spaces[/bold]\n[bold]tab[/bold] - autocomplete\n")
+  print_banner()
+  list_folders()
 
-    elif choice == "q":
-      break
+  if "Calendar" not in [f for f in os.listdir(BASE_DIR) if os.path.isdir(os.path.join(BASE_DIR, f))]:
+    create_folder("Calendar") 
 
-    elif choice == "dn":
-      clear_terminal()
-      if "dailys" not in [f for f in os.listdir(BASE_DIR) if os.path.isdir(os.path.join(BASE_DIR, f))]:
-        create_folder("dailys")
-      in_folder = "dailys"
-      print(f"[bold green]You are in 'dailys' folder.[/bold green]\n")
-      name = datetime.today().strftime('%Y-%m-%d')
-      create_note(in_folder, name)
-
-    elif choice.startswith("mv "):
-      specification = choice[3:].strip()
-      if " " not in specification:
-        print("\n[bold red]Invalid format. Use 'mv source destination'.[/bold red]\n")
-      else:
-        # Split the input into source and destination, accounting for spaces in names
-        try:
-          source, destination = specification.split(" ", 1)
-          move_note_or_folder(source.strip(), destination.strip())
-        except ValueError:
-          print("\n[bold red]Invalid format. Use 'mv source destination'.[/bold red]\n")
+  while running:
+    choice = console.input("[bold blue]cmd: [/bold blue]").strip()
 
-    else:
-      print("\n[bold red]Invalid command.[/bold red]\n")
+    try:
+      if not commands.dispatch(choice):
+        print("\n[bold red]Invalid command.[/bold red]\n")
+    except Exception as e:  # A broken plugin or missing optional dependency shouldn't end the session
+      print(f"\n[bold red]Error running '{escape(choice)}': {escape(str(e))}[/bold red]\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+import json
+import os
+import re
+import zlib
+import appdirs
+import numpy as np
+from rich.console import Console
+from rich.panel import Panel
+from rich.box import DOUBLE_EDGE
+
+console = Console()
+
+# Each note is stored as its TERMS most frequent words, hashed into DIM
+# buckets: one row of bucket ids (int32) and one of weights (float16). With
+# 2^20 buckets distinct words rarely collide, and a 50k note vault still only
+# takes ~75MB. The files live in the cache dir (not the vault, where they would
+# show up as a folder) and are memory-mapped.
+DIM = 2 ** 20
+TERMS = 256
+INDEX_DIR = os.path.join(appdirs.user_cache_dir("Termnotes", "Termnotes"), "related")
+TOKEN_RE = re.compile(r"\w{2,}")  # Unicode words, so accented and non-Latin notes index too
+
+def vectorize(text):
+  """Turns note text into (bucket ids, weights): L2-normalized log term counts, zero-padded to TERMS."""
+  terms = np.zeros(TERMS, dtype=np.int32)
+  weights = np.zeros(TERMS, dtype=np.float16)
+  tokens = TOKEN_RE.findall(text.casefold())
+  if not tokens:
+    return terms, weights
+  buckets = np.fromiter((zlib.crc32(t.encode()) % DIM for t in tokens), dtype=np.int64, count=len(tokens))
+  ids, counts = np.unique(buckets, return_counts=True)
+  if len(ids) > TERMS:  # Long notes keep their most frequent words
+    keep = np.argsort(counts, kind="stable")[-TERMS:]
+    ids, counts = ids[keep], counts[keep]
+  values = np.log1p(counts)
+  terms[:len(ids)] = ids
+  weights[:len(ids)] = values / np.linalg.norm(values)
+  return terms, weights
+
+def scan_vault(base_dir):
+  """Returns {'folder/note': mtime} for every note in the vault."""
+  notes = {}
+  for folder in os.scandir(base_dir):
+    if folder.is_dir():
+      for entry in os.scandir(folder.path):
+        if entry.name.endswith(".md") and entry.is_file():
+          notes[f"{folder.name}/{entry.name[:-3]}"] = entry.stat().st_mtime
+  return notes
+
+def _read_vector(base_dir, key):
+  try:
+    with open(os.path.join(base_dir, f"{key}.md"), "r", encoding="utf-8", errors="ignore") as f:
+      return vectorize(f.read())
+  except OSError:
+    return vectorize("")
+
+def _paths(index_dir):
+  return (os.path.join(index_dir, "terms.npy"), os.path.join(index_dir, "weights.npy"), os.path.join(index_dir, "meta.json"))
+
+def _rows(path):
+  try:
+    rows = np.load(path, mmap_mode="r").shape[0]  # The mapping is released as soon as it goes out of scope
+  except (OSError, ValueError):
+    return 0
+  return rows
+
+def load_slots(index_dir=INDEX_DIR):
+  """Returns one [key, mtime] per row, or [None, 0] for free rows."""
+  terms_path, weights_path, meta_path = _paths(index_dir)
+  try:
+    with open(meta_path, "r") as f:
+      meta = json.load(f)
+  except (OSError, ValueError):
+    return []
+  rows = min(_rows(terms_path), _rows(weights_path))
+  if meta.get("dim") != DIM or meta.get("terms") != TERMS or len(meta["slots"]) > rows:
+    return []  # Built with other settings, or the row files are missing; start over
+  # Rows added by a grow whose metadata never got saved are simply free
+  return meta["slots"] + [[None, 0] for _ in range(rows - len(meta["slots"]))]
+
+def _save_slots(index_dir, slots):
+  meta_path = _paths(index_dir)[2]
+  with open(meta_path + ".tmp", "w") as f:
+    json.dump({"dim": DIM, "terms": TERMS, "slots": slots}, f)
+  os.replace(meta_path + ".tmp", meta_path)
+
+def _grow(path, dtype, rows):
+  """Resizes the .npy at path to 'rows' rows, keeping the old ones.
+
+  No mapping of the old file may be open when this runs, since Windows can't
+  replace a file that is still mapped.
+  """
+  tmp_path = path + ".tmp"
+  grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(rows, TERMS))
+  if os.path.exists(path):
+    old = np.load(path, mmap_mode="r")
+    grown[:min(len(old), rows)] = old[:rows]
+    del old
+  grown.flush()
+  del grown
+  os.replace(tmp_path, path)
+
+def update_index(base_dir, index_dir=INDEX_DIR):
+  """Brings the index up to date, re-reading only notes that were added, changed or removed.
+
+  Row data is written before the slot table is saved, so an interrupted update
+  only leaves rows the next update will rewrite; free rows are never read.
+  """
+  os.makedirs(index_dir, exist_ok=True)
+  terms_path, weights_path, _ = _paths(index_dir)
+  slots = load_slots(index_dir)
+  current = scan_vault(base_dir)
+  row_of = {key: i for i, (key, _) in enumerate(slots) if key is not None}
+
+  stale = [(key, i) for key, i in row_of.items() if current.get(key) != slots[i][1]]
+  added = [key for key in current if key not in row_of]
+  free = [i for i, (key, _) in enumerate(slots) if key is None] + [i for key, i in stale if key not in current]
+  if len(free) < len(added):
+    rows = max(len(slots) + len(added) - len(free), len(slots) * 2, 64)  # Headroom so appends don't rewrite every time
+    _grow(terms_path, np.int32, rows)
+    _grow(weights_path, np.float16, rows)
+    free.extend(range(len(slots), rows))
+    slots.extend([None, 0] for _ in range(rows - len(slots)))
+
+  terms = np.load(terms_path, mmap_mode="r+") if slots else np.zeros((0, TERMS), dtype=np.int32)
+  weights = np.load(weights_path, mmap_mode="r+") if slots else np.zeros((0, TERMS), dtype=np.float16)
+  if not stale and not added:
+    return terms, weights, slots
+
+  for key, i in stale:
+    if key in current:
+      terms[i], weights[i] = _read_vector(base_dir, key)
+      slots[i] = [key, current[key]]
+    else:
+      slots[i] = [None, 0]
+  for key, i in zip(added, free):
+    terms[i], weights[i] = _read_vector(base_dir, key)
+    slots[i] = [key, current[key]]
+  terms.flush()
+  weights.flush()
+  _save_slots(index_dir, slots)
+  return terms, weights, slots
+
+def live_mask(slots):
+  return np.fromiter((key is not None for key, _ in slots), dtype=bool, count=len(slots))
+
+def document_frequencies(terms, weights, live):
+  """Counts, per bucket, how many live notes contain it. Recomputed each time so it can't drift."""
+  live_terms = terms[live]
+  return np.bincount(live_terms[weights[live] > 0], minlength=DIM)
+
+def related_notes(base_dir, folder, name, k=5, index_dir=INDEX_DIR):
+  """Returns up to k (key, score) pairs for the notes most similar to folder/name."""
+  terms, weights, slots = update_index(base_dir, index_dir)
+  key = f"{folder}/{name}"
+  row = next((i for i, (slot_key, _) in enumerate(slots) if slot_key == key), None)
+  if row is None:
+    return []
+
+  live = live_mask(slots)
+  df = document_frequencies(terms, weights, live)
+  idf = np.log((1 + live.sum()) / (1 + df)) + 1
+
+  # Rows hold normalized tf, so scattering the query's tf * idf^2 into a dense
+  # vector and gathering it for every row scores all notes at once.
+  present = weights[row] > 0
+  query = np.zeros(DIM, dtype=np.float32)
+  query[terms[row][present]] = weights[row][present] * idf[terms[row][present]] ** 2
+  scores = (query[terms] * weights).sum(axis=1, dtype=np.float32)
+  scores[~live] = 0
+  scores[row] = 0
+  k = min(k, len(scores) - 1)
+  if k <= 0:
+    return []
+  top = np.argpartition(scores, -k)[-k:]
+  top = top[np.argsort(scores[top])[::-1]]
+  return [(slots[i][0], float(scores[i])) for i in top if scores[i] > 0]
+
+def show_related(base_dir, current_note, k=5):
+  """Prints the notes most similar to the last opened note."""
+  if current_note is None:
+    console.print("\n[bold red]Open a note first to see related notes.[/bold red]\n")
+    return
+
+  folder, name = current_note
+  results = related_notes(base_dir, folder, name, k)
+  if not results:
+    console.print(f"\n[bold yellow]No notes related to '{name}' found.[/bold yellow]\n")
+    return
+
+  lines = [f"[bold]{key}[/bold] (n)" for key, _ in results]
+  content = "\n".join([f"├── {line}" for line in lines[:-1]] + [f"└── {lines[-1]}"])
+  results_panel = Panel(content, title=f"[bold green]Related to {name}[/bold green]", box=DOUBLE_EDGE)
+  console.print("\n")
+  console.print(results_panel)
+  console.print("\n")
@@ -8,6 +8,8 @@ setup(
     "gnureadline",
     "pyperclip",
     "rich",
+    "numpy",
+    'importlib_metadata; python_version < "3.8"',
   ],
   entry_points={
     'console_scripts': [
@@ -0,0 +1,20 @@
+import os
+import sys
+import pytest
+
+# The app is a set of top-level modules, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def write_note():
+  """Returns a function that writes base_dir/key.md as UTF-8 and returns its path."""
+  def write(base_dir, key, text, mtime=None):
+    path = os.path.join(str(base_dir), f"{key}.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+      f.write(text)
+    if mtime is not None:
+      os.utime(path, (mtime, mtime))
+    return path
+  return write
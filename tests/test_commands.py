@@ -0,0 +1,95 @@
+import sys
+import pytest
+import commands
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+  monkeypatch.setattr(commands, "_registry", {})
+
+
+class FakeEntryPoint:
+  def __init__(self, name, handler):
+    self.name = name
+    self.value = f"fake:{name}"
+    self.loads = 0
+    self._handler = handler
+
+  def load(self):
+    self.loads += 1
+    return self._handler
+
+
+def test_parsers():
+  assert commands.no_args("") == ()
+  assert commands.no_args("x") is None
+  assert commands.one_arg("my note") == ("my note",)
+  assert commands.one_arg("") is None
+  assert commands.raw("") == ("",)
+
+
+def test_dispatch_splits_name_from_rest():
+  calls = []
+  commands.register("o", commands.one_arg, calls.append)
+  commands.register("l", commands.no_args, lambda: calls.append("listed"))
+  assert commands.dispatch("o some note")
+  assert commands.dispatch("l")
+  assert calls == ["some note", "listed"]
+
+
+def test_dispatch_rejects_unknown_and_unparsed():
+  commands.register("l", commands.no_args, lambda: None)
+  commands.register("o", commands.one_arg, lambda name: None)
+  assert not commands.dispatch("zz")
+  assert not commands.dispatch("l extra")
+  assert not commands.dispatch("o")
+
+
+def test_module_handler_is_imported_on_first_dispatch(tmp_path, monkeypatch):
+  (tmp_path / "lazy_cmd.py").write_text("calls = []\ndef handle(rest):\n  calls.append(rest)\n")
+  monkeypatch.syspath_prepend(str(tmp_path))
+  monkeypatch.delitem(sys.modules, "lazy_cmd", raising=False)
+
+  commands.register("lazy", commands.raw, "lazy_cmd:handle")
+  assert "lazy_cmd" not in sys.modules
+  assert commands.dispatch("lazy hi")
+  assert sys.modules["lazy_cmd"].calls == ["hi"]
+
+
+def test_failed_import_is_retried(monkeypatch):
+  commands.register("broken", commands.raw, "no_such_module_here:fn")
+  with pytest.raises(ImportError):
+    commands.dispatch("broken")
+  with pytest.raises(ImportError):
+    commands.dispatch("broken")
+
+
+def test_plugin_loads_on_first_dispatch_only(monkeypatch):
+  calls = []
+  ep = FakeEntryPoint("wc", calls.append)
+  monkeypatch.setattr(commands, "_plugin_entry_points", lambda: [ep])
+
+  commands.load_plugins()
+  assert ep.loads == 0
+  assert commands.get("wc").help
+  assert commands.dispatch("wc some text")
+  assert commands.dispatch("wc")
+  assert ep.loads == 1
+  assert calls == ["some text", ""]
+
+
+def test_plugins_do_not_override_builtins(monkeypatch):
+  ep = FakeEntryPoint("l", lambda rest: None)
+  monkeypatch.setattr(commands, "_plugin_entry_points", lambda: [ep])
+  calls = []
+  commands.register("l", commands.no_args, lambda: calls.append("builtin"))
+
+  commands.load_plugins()
+  assert commands.dispatch("l")
+  assert calls == ["builtin"]
+  assert ep.loads == 0
+
+
+def test_load_resolves_module_attr():
+  import os.path
+  assert commands.load("os.path:join") is os.path.join
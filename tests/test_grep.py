@@ -0,0 +1,44 @@
+import grep
+
+
+def hits_for(path, pattern):
+  grep._set_pattern(pattern)
+  return grep.grep_file(path)[1]
+
+
+def test_unicode_classes_match_non_ascii_text(tmp_path, write_note):
+  path = write_note(tmp_path, "food/menu", "intro\na naïve café\noutro\n")
+  assert [hit[0] for hit in hits_for(path, r"na\wve")] == [2]
+  assert [hit[0] for hit in hits_for(path, r"caf.$")] == [2]
+  assert hits_for(path, r"[éè]")[0][2] == "a naïve café"
+
+
+def test_hit_has_context_and_highlight_offsets(tmp_path, write_note):
+  path = write_note(tmp_path, "work/tickets", "über ticket-1234 done\nnext\r\nticket-99\n")
+  lineno, before, line, start, end, after = hits_for(path, r"ticket-\d{4}")[0]
+  assert (lineno, before, after) == (1, [], ["next"])
+  assert line[start:end] == "ticket-1234"
+
+
+def test_one_hit_per_line_and_empty_files(tmp_path, write_note):
+  path = write_note(tmp_path, "a/many", "x x x\ny\nx\n")
+  assert [hit[0] for hit in hits_for(path, "x")] == [1, 3]
+  empty = write_note(tmp_path, "a/empty", "")
+  assert hits_for(empty, "x") == []
+
+
+def test_grep_uses_pool_for_large_vaults(tmp_path, monkeypatch, capsys, write_note):
+  for i in range(5):
+    write_note(tmp_path, f"n/note{i}", f"line\nticket-{i:04d} é\n")
+  monkeypatch.setattr(grep, "MIN_FILES_FOR_POOL", 2)
+  grep.grep(str(tmp_path), r"ticket-\d{4} \w")
+  assert "5 matching lines in 5 notes." in capsys.readouterr().out
+
+
+def test_no_phantom_line_after_final_newline(tmp_path, write_note):
+  path = write_note(tmp_path, "a/lines", "a\nb\n")
+  for pattern in (r"^", r"$", r"x*"):
+    assert [hit[0] for hit in hits_for(path, pattern)] == [1, 2]
+  assert hits_for(path, r"\Z") == []  # Only matches after the final newline
+  blank = write_note(tmp_path, "a/blank", "a\n\nb\n")
+  assert [hit[0] for hit in hits_for(blank, r"^$")] == [2]
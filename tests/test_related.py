@@ -0,0 +1,83 @@
+import os
+import numpy as np
+import pytest
+import related
+
+
+def index_by_key(base_dir, index_dir):
+  terms, weights, slots = related.update_index(base_dir, index_dir)
+  live = related.live_mask(slots)
+  rows = {key: (terms[i].tolist(), weights[i].tolist()) for i, (key, _) in enumerate(slots) if key is not None}
+  return rows, related.document_frequencies(terms, weights, live)
+
+
+def assert_matches_fresh_build(vault, index_dir, tmp_path):
+  incremental, incremental_df = index_by_key(vault, index_dir)
+  fresh, fresh_df = index_by_key(vault, str(tmp_path / "fresh"))
+  assert incremental == fresh
+  assert np.array_equal(incremental_df, fresh_df)
+
+
+@pytest.fixture
+def vault(tmp_path, write_note):
+  base_dir = str(tmp_path / "vault")
+  write_note(base_dir, "pets/cats", "cats purr and cats sleep, kitten whiskers")
+  write_note(base_dir, "pets/dogs", "dogs bark and fetch, puppy tail")
+  write_note(base_dir, "misc/kitten", "a kitten is a young cat with whiskers that purr")
+  write_note(base_dir, "misc/tax", "tax return deadline invoice")
+  return base_dir
+
+
+def test_related_ranks_shared_words_first(vault, tmp_path):
+  results = related.related_notes(vault, "pets", "cats", k=2, index_dir=str(tmp_path / "index"))
+  assert results[0][0] == "misc/kitten"
+  assert all(key != "pets/cats" for key, _ in results)
+
+
+def test_non_ascii_words_are_whole_tokens(tmp_path, write_note):
+  terms, weights = related.vectorize("Café ÜBER naïve")
+  assert (weights > 0).sum() == 3
+  assert np.array_equal(related.vectorize("café über naïve")[0], terms)
+
+  base_dir = str(tmp_path / "vault")
+  write_note(base_dir, "ru/privet", "привет мир, это заметка о кошках")
+  write_note(base_dir, "ru/koshki", "заметка о кошках и котятах")
+  write_note(base_dir, "ru/nalogi", "налоговая декларация")
+  results = related.related_notes(base_dir, "ru", "privet", k=2, index_dir=str(tmp_path / "index"))
+  assert results[0][0] == "ru/koshki"
+
+
+def test_add_change_and_delete_update_incrementally(vault, tmp_path, write_note):
+  index_dir = str(tmp_path / "index")
+  related.update_index(vault, index_dir)
+
+  write_note(vault, "misc/tax", "now this note is about cats and whiskers", mtime=1)
+  os.remove(os.path.join(vault, "pets", "dogs.md"))
+  for i in range(100):  # Enough to grow the row files past their headroom
+    write_note(vault, f"bulk/n{i}", f"note {i} about puppies")
+  assert_matches_fresh_build(vault, index_dir, tmp_path)
+
+  _, _, slots = related.update_index(vault, index_dir)
+  keys = {key for key, _ in slots if key is not None}
+  assert "pets/dogs" not in keys
+  assert len(keys) == 103
+
+
+def test_interrupted_update_recovers(vault, tmp_path, monkeypatch, write_note):
+  index_dir = str(tmp_path / "index")
+  related.update_index(vault, index_dir)
+
+  def crash(index_dir, slots):
+    raise KeyboardInterrupt
+  monkeypatch.setattr(related, "_save_slots", crash)
+  write_note(vault, "pets/cats", "completely different words now", mtime=1)
+  os.remove(os.path.join(vault, "misc", "tax.md"))
+  write_note(vault, "misc/new", "a brand new note")
+  with pytest.raises(KeyboardInterrupt):
+    related.update_index(vault, index_dir)
+  monkeypatch.undo()
+
+  write_note(vault, "pets/cats", "cats again, with whiskers", mtime=2)
+  assert_matches_fresh_build(vault, index_dir, tmp_path)
+  _, df = index_by_key(vault, index_dir)
+  assert df.min() >= 0